@@ -2,9 +2,75 @@
 
 import re
 import random
+import collections
 from typing import Optional
 
 
+# All top-level directives are recognized by one master alternation, so a
+# single finditer pass over the document replaces one full scan per
+# directive kind. Branch order is the tie-break when two kinds could match
+# at the same position (replacements before rules before categories, ...);
+# (?s:...) keeps re.DOTALL local to the branches that had it.
+_EXTRACTOR_PATTERNS = (
+    ('pattern', r'(?s:\(\s*\+\s*(.*?)\s*-\s*(.*?)\))'),
+    ('replacement', r'\{\s*(.*?)\s*\}\s*->\s*\{\s*(.*?)\s*\}'),
+    ('rule', r'\{\s*\[(\d+(\.\d+)?)\]\s*(.*?)\s*>\s*(.*?)\}'),
+    ('rules_number', r'\[\[(\d+(\.\d+)?)\]\]'),
+    ('stopwords', r'(?s:-\s*\{\s*(.*?)\s*\})'),
+    ('additional_response', r'(?s:\+\s*\(\s*(.*?)\s*\))'),
+    ('definition', r'(?s:#(\S+)\s*:\s*(.*?)\s*\.)'),
+    # the body must stay inside one brace pair and the lookarounds reject
+    # rule ('{[') and replacement ('} ->') braces, so a stray word before
+    # such a directive makes this branch fail instead of eating it
+    ('category', r'(\S+)\s*\{(?!\s*\[)([^}]*)\}(?!\s*->)'),
+)
+_MASTER_RE = re.compile(
+    '|'.join(
+        f'(?P<{name}>{pattern})' for name, pattern in _EXTRACTOR_PATTERNS
+    )
+)
+# Extraction regexes for the structurally different passes, compiled once
+# at import time instead of on every parse() call. Variables get their own
+# full-document scan because '=name: value' may sit inside a pattern's
+# response body, which the master scan consumes as part of the pattern.
+_VARIABLE_RE = re.compile(r'=\s*(\w+):\s*(\S+)')
+_CONDITION_PATTERN_RE = re.compile(
+    r'\(\s*\+\s*(.*?)\s*-\s*(.*?)\s*\)',
+    flags=re.DOTALL
+)
+_CONDITION_BRACKET_RE = re.compile(r'\[([^\]]+)\]', flags=re.DOTALL)
+_CONDITIONAL_BLOCK_RE = re.compile(
+    r'\('
+    r'\s*\+\s*(.*?)\s*\.\s*'
+    r'\[(.*?)\]\s*:\s*'
+    r'\-\s*(.*?)\s*'
+    r'(?:!\[\s*(.*?)\s*\]\s*:\s*'
+    r'\-\s*(.*?)\s*)*'
+    r'!\s*:\s*'
+    r'\-\s*(.*?)\s*'
+    r'\)'
+)
+_NESTED_MESSAGE_RE = re.compile(
+    r'\(\s*\+\s*([^\(\)]*?)\s*-\s*([^\(\)]*?)\s*(\(.*?\))\s*\)',
+    flags=re.DOTALL
+)
+_NESTED_PATTERN_RE = re.compile(
+    r'\(\s*\+\s*(.*?)\s*-\s*(.*?)\s*\)',
+    flags=re.DOTALL
+)
+# splits a Yooz pattern on its non-literal parts (wildcards, &categories,
+# {keywords}); whatever remains must appear verbatim in a matching message
+_LITERAL_SPLIT_RE = re.compile(r'\*\d*|&\w+|\{[^}]*\}')
+# matches every placeholder kind of a response template at once:
+# *N (match group), =name / =name:value (variable), #name (definition)
+_RESOLVE_RE = re.compile(r'\*(\d+)|=(\w+)(?::\S+)?|#(\S+)')
+_KEYWORDS_RE = re.compile(r'\{([^}]*)\}')
+_CATEGORY_TOKEN_RE = re.compile(r'&(\w+)')
+# below this many literal-filtered candidate patterns, plain per-pattern
+# matching beats building/looking up a narrowed master alternation
+_MASTER_MIN_CANDIDATES = 4
+
+
 class YoozParser:
     """
     A parser for the Yooz, used for processing conversational patterns,
@@ -26,9 +92,32 @@ class YoozParser:
         self.rules_value = 0.0
         self.memory = {}
         self.nested_messages = {}
-        self.message_history = []
+        # only the most recent messages are ever read back (see
+        # _process_nested_messages), so the history doesn't need to grow
+        # with the conversation
+        self.message_history = collections.deque(maxlen=8)
         self.last_message = ''
-    
+        self._category_map = {}
+        self._replacements_map = {}
+        self._replacements_re = None
+        self._stopwords_set = set()
+        self._rules_by_trigger = {}
+        self._rules_injections = {}
+        self._rules_re = None
+        self._condition_cache = {}
+        # parallel per-pattern arrays built by _finalize_patterns(); the
+        # message loops index these instead of chasing dict lookups
+        self._pat_is_conditional = []
+        self._pat_user = []
+        self._pat_regex = []
+        self._pat_responses = []
+        self._pat_literals = []
+        self._pat_keyword_sep = []
+        self._pat_keyword_list = []
+        self._pat_conditions = []
+        self._master_group_index = {}
+        self._candidate_master_cache = {}
+
     def parse(self, input_text: str) -> None:
         """
         Parses the Yooz input to extract categories,
@@ -37,16 +126,87 @@ class YoozParser:
         :param input_text: The input text containing Yooz syntax (str)
         :return: None
         """
-        self._extract_categories(input_text)
-        self._extract_general_definitions(input_text)
-        self._extract_replacements(input_text)
-        self._extract_conversational_patterns(input_text)
-        self._extract_conditions(input_text)
-        self._extract_stopwords(input_text)
-        self._extract_additional_response(input_text)
-        self._extract_rules_and_rules_number(input_text)
+        self._extract_directives(input_text)
         self._extract_variables(input_text)
+        self._extract_conditions(input_text)
         self._extract_nested_messages(input_text)
+        self._finalize_patterns()
+
+        # literal prefilter (see _extract_literals): lets get_response skip
+        # a trigger's regex entirely when its fixed words are absent
+        for parent_trigger, nested_data in self.nested_messages.items():
+            nested_data['_literals'] = self._extract_literals(parent_trigger)
+            for nested_pattern in nested_data['nested_patterns']:
+                nested_pattern['_literals'] = self._extract_literals(
+                    nested_pattern['user_pattern']
+                )
+
+    def _finalize_patterns(self) -> None:
+        """
+        Builds the parallel per-pattern arrays used by get_response().
+        Everything the message loops need per pattern — compiled regex,
+        literal prefilter, responses, keywords, condition fields — is laid
+        out in lists indexable by pattern number, so the hot loops do plain
+        list indexing instead of repeated dict lookups.
+
+        :return: None
+        """
+        self._pat_is_conditional = []
+        self._pat_user = []
+        self._pat_regex = []
+        self._pat_responses = []
+        self._pat_literals = []
+        self._pat_keyword_sep = []
+        self._pat_keyword_list = []
+        self._pat_conditions = []
+        for pattern in self.patterns:
+            is_conditional = 'pattern' in pattern
+            user_pattern = (
+                pattern['pattern'] if is_conditional
+                else pattern['user_pattern']
+            )
+            self._pat_is_conditional.append(is_conditional)
+            self._pat_user.append(user_pattern)
+            self._pat_regex.append(self._create_regex(user_pattern))
+            self._pat_responses.append(pattern.get('bot_responses'))
+            self._pat_literals.append(self._extract_literals(user_pattern))
+            self._pat_keyword_sep.append(pattern.get('_keyword_sep'))
+            self._pat_keyword_list.append(pattern.get('_keyword_list'))
+            self._pat_conditions.append((
+                pattern['main_condition'],
+                pattern['main_response'],
+                pattern.get('optional_condition'),
+                pattern.get('optional_response'),
+                pattern['default_response']
+            ) if is_conditional else None)
+
+        # get_response() fuses the regexes of the patterns that survive the
+        # literal prefilter into one alternation of named branches, memoized
+        # per candidate set (see _candidate_master_regex); one match() call
+        # then names the first matching pattern or proves that none match
+        self._master_group_index = {
+            f'p{index}': index for index in range(len(self._pat_regex))
+        }
+        self._candidate_master_cache = {}
+
+    def _candidate_master_regex(self, candidates: tuple) -> re.Pattern:
+        """
+        Returns the combined alternation regex for the given candidate
+        pattern indexes, building and memoizing it on first use. Messages
+        with the same literal-filter outcome share one compiled regex.
+
+        :param candidates: The candidate pattern indexes (tuple)
+
+        :return: The compiled alternation regex (re.Pattern)
+        """
+        master = self._candidate_master_cache.get(candidates)
+        if master is None:
+            master = re.compile('|'.join(
+                f'(?P<p{index}>{self._pat_regex[index].pattern})'
+                for index in candidates
+            ))
+            self._candidate_master_cache[candidates] = master
+        return master
     
     def get_response(self, user_message: str) -> str:
         """
@@ -68,49 +228,72 @@ class YoozParser:
         if response := self._process_nested_messages(cleaned_message):
             return response  # else: bot-response will be generated in next steps
         
-        # to process "keywords" base on "rules", if there is any keyword
-        for pattern in self.patterns:
-            if 'user_pattern' in pattern:
-                if '{' in pattern['user_pattern'] and '}' in pattern['user_pattern']:
-                    keywords = re.findall(r'\{(.*?)\}', pattern['user_pattern'])[0]
-                    if '،' in keywords and '_' in keywords:
-                        # raise SyntaxError: کلمات کلیدی باید یا با '،' یا با '_' جدا بشن و نه هر دو
-                        pass
-                    elif '،' in keywords:  # presence of all keywords in cleaned_message is necessary
-                        final_response = self._process_keywords_split_by_comma(
-                            keywords, cleaned_message, final_response, pattern
-                        )
-                    elif '_' in keywords:  # presence of one keyword in cleaned_message is sufficient
-                        final_response = self._process_keywords_split_by_underscore(
-                            keywords, cleaned_message, final_response, pattern
-                        )
-        
-        while True:
-            found_match = False
-            for pattern in self.patterns:
-                if "pattern" in pattern:  # if True: we have a conditional-pattern
-                    if response := self._process_conditional_pattern(pattern, cleaned_message):
-                        return response
-                    break
-                
-                response = self._process_normal_pattern(pattern, cleaned_message)
-                if response:
-                    if response in visited_responses:
-                        continue
-                    visited_responses.add(response)
-                    if response.endswith('!>'):
-                        response = response[:-2].strip()
-                        final_response += response + " "
-                        found_match = True
-                    else:
-                        final_response += response
-                        if self.additional_response:
-                            final_response += " " + self.additional_response
-                        
-                        return final_response.strip()
-            
-            if not found_match:
-                break
+        # to process "keywords" base on "rules", if there is any keyword;
+        # the message words go into a set once, so each single-word keyword
+        # costs an O(1) membership test instead of a substring scan
+        word_set = set(cleaned_message.split())
+        for index in range(len(self._pat_user)):
+            keyword_sep = self._pat_keyword_sep[index]
+            if keyword_sep == '،':  # presence of all keywords in cleaned_message is necessary
+                final_response = self._process_keywords_split_by_comma(
+                    self._pat_keyword_list[index], cleaned_message, word_set,
+                    final_response, self._pat_responses[index]
+                )
+            elif keyword_sep == '_':  # presence of one keyword in cleaned_message is sufficient
+                final_response = self._process_keywords_split_by_underscore(
+                    self._pat_keyword_list[index], cleaned_message, word_set,
+                    final_response, self._pat_responses[index]
+                )
+
+        # conditional patterns first: a matching one ends the turn immediately
+        for index in range(len(self._pat_user)):
+            if self._pat_is_conditional[index]:
+                if response := self._process_conditional_pattern(index, cleaned_message):
+                    return response
+
+        # single pass over the normal patterns: responses marked with '!>'
+        # accumulate, the first plain response ends the turn. Filter, then
+        # verify: only patterns whose literal words all occur in the
+        # message are candidates, and when enough of them survive, one
+        # scan with their fused alternation (branches tried in pattern
+        # order) finds the first match — or proves there is none —
+        # without visiting the earlier candidates at all
+        candidates = tuple(
+            index for index in range(len(self._pat_user))
+            if not self._pat_is_conditional[index] and (
+                not self._pat_literals[index] or
+                all(
+                    literal in cleaned_message
+                    for literal in self._pat_literals[index]
+                )
+            )
+        )
+        first_position = 0
+        if len(candidates) >= _MASTER_MIN_CANDIDATES:
+            master_match = self._candidate_master_regex(candidates).match(
+                cleaned_message
+            )
+            if master_match:
+                first_position = candidates.index(
+                    self._master_group_index[master_match.lastgroup]
+                )
+            else:
+                first_position = len(candidates)
+        for index in candidates[first_position:]:
+            response = self._process_normal_pattern(index, cleaned_message)
+            if response:
+                if response in visited_responses:
+                    continue
+                visited_responses.add(response)
+                if response.endswith('!>'):
+                    response = response[:-2].strip()
+                    final_response += response + " "
+                else:
+                    final_response += response
+                    if self.additional_response:
+                        final_response += " " + self.additional_response
+
+                    return final_response.strip()
 
         if final_response:
             if self.additional_response:
@@ -126,160 +309,180 @@ class YoozParser:
     # used in parse() :
     # (don't need docstring. the name of each methods shows its functionality!)
     
-    def _extract_categories(self, input_text: str) -> None:
-        category_regex = re.compile(r'(\S+)\s*\{(.*?)\}', re.DOTALL)
-        for match in category_regex.finditer(input_text):
-            category_name = match.group(1).strip()
-            items = [item.strip() for item in match.group(2).split('،')]
-            self.categories.append((category_name, items))
-    
-    def _extract_general_definitions(self, input_text: str) -> None:
-        definition_regex = re.compile(
-            r'#(\S+)\s*:\s*(.*?)\s*\.', flags=re.DOTALL
-        )
-        for match in definition_regex.finditer(input_text):
+    def _extract_directives(self, input_text: str) -> None:
+        # one finditer pass with _MASTER_RE recognizes every top-level
+        # directive; match.lastgroup names the directive kind and the
+        # kind's sub-groups start right after its named group
+        handlers = {
+            'pattern': self._handle_pattern,
+            'replacement': self._handle_replacement,
+            'rule': self._handle_rule,
+            'stopwords': self._handle_stopwords,
+            'definition': self._handle_definition,
+            'category': self._handle_category,
+        }
+        rules_number_seen = False
+        additional_response_seen = False
+        for match in _MASTER_RE.finditer(input_text):
+            kind = match.lastgroup
+            base = _MASTER_RE.groupindex[kind]
+            if kind == 'rules_number':  # only the first occurrence counts
+                if not rules_number_seen:
+                    rules_number_seen = True
+                    self.rules_value = float(match.group(base + 1))
+            elif kind == 'additional_response':  # only the first occurrence counts
+                if not additional_response_seen:
+                    additional_response_seen = True
+                    self.additional_response = match.group(base + 1).strip()
+            else:
+                handlers[kind](match, base)
+
+        # structures derived from the collected directives:
+        # category name -> ready regex alternation, so _create_regex expands
+        # all &category tokens of a pattern in one pass over it
+        self._category_map = {
+            name: f"({'|'.join(items)})" for name, items in self.categories
+        }
+        if self.replacements:
+            # one alternation regex + dispatch dict, so _process_replacements
+            # scans the message once instead of once per replacement pair
+            self._replacements_map = dict(self.replacements)
+            self._replacements_re = re.compile(
+                r'\b(?:'
+                + '|'.join(re.escape(source) for source, _ in self.replacements)
+                + r')\b'
+            )
+        # set copy for O(1) membership tests in _remove_stop_words()
+        self._stopwords_set = set(self.stopWords)
+        # one alternation over the triggers of all applicable rules, so
+        # _inject_rules() finds every occurrence in a single scan
+        applicable_rules = [
+            rule for rule in self.rules if self.rules_value <= rule['rule']
+        ]
+        self._rules_by_trigger = {
+            rule['trigger']: rule for rule in applicable_rules
+        }
+        # the replacement text per trigger is fixed, so build it here once;
+        # the _inject_rules() callback then reduces to a dict lookup
+        self._rules_injections = {
+            trigger: trigger + " " + rule['response']
+            for trigger, rule in self._rules_by_trigger.items()
+        }
+        if self._rules_by_trigger:
+            # longest triggers first, so they win over overlapping short ones
+            triggers = sorted(self._rules_by_trigger, key=len, reverse=True)
+            self._rules_re = re.compile(
+                '|'.join(re.escape(trigger) for trigger in triggers)
+            )
+        else:
+            self._rules_re = None
+
+    def _handle_category(self, match: re.Match, base: int) -> None:
+        category_name = match.group(base + 1).strip()
+        items = [item.strip() for item in match.group(base + 2).split('،')]
+        self.categories.append((category_name, items))
+
+    def _handle_definition(self, match: re.Match, base: int) -> None:
+        key = match.group(base + 1).strip()
+        value = match.group(base + 2).strip()
+        self.definitions[key] = value
+
+    def _handle_replacement(self, match: re.Match, base: int) -> None:
+        source_words = [
+            word.strip() for word in match.group(base + 1).split('،')
+        ]
+        target_words = [
+            word.strip() for word in match.group(base + 2).split('،')
+        ]
+        self.replacements.extend(zip(source_words, target_words))
+
+    def _handle_pattern(self, match: re.Match, base: int) -> None:
+        user_pattern = match.group(base + 1).strip()
+        bot_responses = [
+            resp.strip() for resp in match.group(base + 2).split('_')
+        ]
+        if not user_pattern:  # اگر الگوی کاربر خالی باشد
+            self.global_responses.extend(bot_responses)
+        else:
+            pattern = {
+                'user_pattern': user_pattern,
+                'bot_responses': bot_responses
+            }
+            self._extract_pattern_keywords(pattern)
+            self.patterns.append(pattern)
+
+    def _handle_stopwords(self, match: re.Match, base: int) -> None:
+        words = [word.strip() for word in match.group(base + 1).split('،')]
+        self.stopWords.extend(words)
+
+    def _handle_rule(self, match: re.Match, base: int) -> None:
+        self.rules.append({
+            'rule': float(match.group(base + 1).strip()),
+            'trigger': match.group(base + 3).strip(),
+            'response': match.group(base + 4).strip()
+        })
+
+    def _extract_variables(self, input_text: str) -> None:
+        for match in _VARIABLE_RE.finditer(input_text):
             key = match.group(1).strip()
             value = match.group(2).strip()
-            self.definitions[key] = value
-    
-    def _extract_replacements(self, input_text: str) -> None:
-        replacement_regex = re.compile(
-            r'\{\s*(.*?)\s*\}\s*->\s*\{\s*(.*?)\s*\}'
-        )
-        for match in replacement_regex.finditer(input_text):
-            source_words = [
-                word.strip() for word in match.group(1).split('،')
-            ]
-            target_words = [
-                word.strip() for word in match.group(2).split('،')
-            ]
-            self.replacements.extend(zip(source_words, target_words))
-    
-    def _extract_conversational_patterns(self, input_text: str) -> None:
-        pattern_regex = re.compile(
-            # r'\(\s*\+\s*(.*?)\s*-\s*(.*?)\s*\n(\s*\))?',
-            r'\(\s*\+\s*(.*?)\s*-\s*(.*?)\)',
-            flags=re.DOTALL
-        )
-        for match in pattern_regex.finditer(input_text):
-            user_pattern = match.group(1).strip()
-            bot_responses = [
-                resp.strip() for resp in match.group(2).split('_')
-            ]
-            if not user_pattern:  # اگر الگوی کاربر خالی باشد
-                self.global_responses.extend(bot_responses)
-            else:
-                self.patterns.append({
-                    'user_pattern': user_pattern,
-                    'bot_responses': bot_responses
-                })
+            self.memory[key] = value
+
+    @staticmethod
+    def _extract_pattern_keywords(pattern: dict) -> None:
+        # precomputes the {keywords} of a conversational pattern, so
+        # get_response() doesn't have to re-scan the pattern each turn
+        match = _KEYWORDS_RE.search(pattern['user_pattern'])
+        if not match:
+            return
+        keywords = match.group(1)
+        if '،' in keywords and '_' in keywords:
+            # raise SyntaxError: کلمات کلیدی باید یا با '،' یا با '_' جدا بشن و نه هر دو
+            pass
+        elif '،' in keywords:  # presence of all keywords is necessary
+            pattern['_keyword_sep'] = '،'
+            pattern['_keyword_list'] = keywords.split('،')
+        elif '_' in keywords:  # presence of one keyword is sufficient
+            pattern['_keyword_sep'] = '_'
+            pattern['_keyword_list'] = keywords.split('_')
     
     def _extract_conditions(self, input_text: str) -> None:
-        pattern_matches = re.findall(
-            r'\(\s*\+\s*(.*?)\s*-\s*(.*?)\s*\)',
-            string=input_text,
-            flags=re.DOTALL
-        )
-        for match in pattern_matches:
-            user_pattern = match[0].strip()
-            bot_responses = [
-                response.strip() for response in match[1].split('_')
-            ]
+        has_conditional_pattern = False
+        for match in _CONDITION_PATTERN_RE.finditer(input_text):
+            user_pattern = match.group(1).strip()
             if not user_pattern:
-                self.global_responses.extend(bot_responses)
-            elif re.findall(
-                    r'\[([^\]]+)\]', user_pattern, flags=re.DOTALL
-            ):
-                
-                matches = re.findall(
-                    r'\('
-                    r'\s*\+\s*(.*?)\s*\.\s*'
-                    r'\[(.*?)\]\s*:\s*'
-                    r'\-\s*(.*?)\s*'
-                    r'(?:!\[\s*(.*?)\s*\]\s*:\s*'
-                    r'\-\s*(.*?)\s*)*'
-                    r'!\s*:\s*'
-                    r'\-\s*(.*?)\s*'
-                    r'\)',
-                    string=input_text
+                self.global_responses.extend(
+                    response.strip() for response in match.group(2).split('_')
                 )
-                for match_ in matches:
-                    self.patterns.append({
-                        'pattern': match_[0].strip(),  # الگوی کاربر
-                        'main_condition': match_[1].strip() if match_[1] else None,  # شرط اصلی
-                        'main_response': match_[2].strip(),  # پاسخ اصلی
-                        'optional_condition': match_[3].strip() if len(match_) > 3 and match_[3] else None,
-                        # شرط اختیاری
-                        'optional_response': match_[4].strip() if len(match_) > 4 and match_[4] else None,
-                        # پاسخ اختیاری
-                        'default_response': match_[5].strip()  # پاسخ پیش‌فرض
-                    })
-            else:
-                pass
-    
-    def _extract_stopwords(self, input_text: str) -> None:
-        stopwords_regex = re.compile(
-            r'-\s*\{\s*(.*?)\s*\}', re.DOTALL
-        )
-        for match in stopwords_regex.finditer(input_text):
-            words = [word.strip() for word in match.group(1).split('،')]
-            self.stopWords.extend(words)
-    
-    def _extract_additional_response(self, input_text: str) -> None:
-        additional_response_regex = re.compile(
-            r'\+\s*\(\s*(.*?)\s*\)',
-            flags=re.DOTALL
-        )
-        match = additional_response_regex.search(input_text)
-        if match:
-            self.additional_response = match.group(1).strip()
-    
-    def _extract_rules_and_rules_number(self, input_text: str) -> None:
-        # Extract rules number
-        rules_number_regex = re.compile(r'\[\[(\d+(\.\d+)?)\]\]')
-        match = rules_number_regex.search(input_text)
-        if match:
-            self.rules_value = float(match.group(1))
-        
-        # Extract rules
-        rules_regex = re.compile(
-            r'\{\s*\[(\d+(\.\d+)?)\]\s*(.*?)\s*>\s*(.*?)\}'
-        )
-        for match in rules_regex.finditer(input_text):
-            rule = float(match.group(1).strip())
-            trigger = match.group(3).strip()
-            response = match.group(4).strip()
-            self.rules.append({
-                'rule': rule,
-                'trigger': trigger,
-                'response': response
-            })
-    
-    def _extract_variables(self, input_text: str) -> None:
-        save_data_regex = re.compile(r'=\s*(\w+):\s*(\S+)')
-        for match in save_data_regex.finditer(input_text):
-            key = match.group(1).strip()
-            value = match.group(2).strip()
-            self.memory[key] = value
+            elif _CONDITION_BRACKET_RE.search(user_pattern):
+                has_conditional_pattern = True
+
+        # the conditional-block regex used to be re-run against the whole
+        # document for every bracket-containing pattern above, inserting
+        # each conditional pattern that many times; scan it once instead
+        if has_conditional_pattern:
+            for match_ in _CONDITIONAL_BLOCK_RE.findall(input_text):
+                self.patterns.append({
+                    'pattern': match_[0].strip(),  # الگوی کاربر
+                    'main_condition': match_[1].strip() if match_[1] else None,  # شرط اصلی
+                    'main_response': match_[2].strip(),  # پاسخ اصلی
+                    'optional_condition': match_[3].strip() if len(match_) > 3 and match_[3] else None,
+                    # شرط اختیاری
+                    'optional_response': match_[4].strip() if len(match_) > 4 and match_[4] else None,
+                    # پاسخ اختیاری
+                    'default_response': match_[5].strip()  # پاسخ پیش‌فرض
+                })
     
     def _extract_nested_messages(self, input_text: str) -> None:
         # Extract nested messages
-        nested_message_regex = re.compile(
-            r'\(\s*\+\s*([^\(\)]*?)\s*-\s*([^\(\)]*?)\s*(\(.*?\))\s*\)',
-            flags=re.DOTALL
-        )
-        for match in nested_message_regex.finditer(input_text):
+        for match in _NESTED_MESSAGE_RE.finditer(input_text):
             parent_trigger = match.group(1).strip()
             parent_response = match.group(2).strip()
             nested_commands = match.group(3).strip()
             
             # Parse nested commands
             nested_patterns = []
-            nested_regex = re.compile(
-                r'\(\s*\+\s*(.*?)\s*-\s*(.*?)\s*\)',
-                flags=re.DOTALL
-            )
-            for nested_match in nested_regex.finditer(nested_commands):
+            for nested_match in _NESTED_PATTERN_RE.finditer(nested_commands):
                 nested_user_pattern = nested_match.group(1).strip()
                 nested_bot_response = nested_match.group(2).strip()
                 nested_patterns.append({
@@ -290,6 +493,16 @@ class YoozParser:
                 'responses': parent_response.split("_"),
                 'nested_patterns': nested_patterns
             }
+
+        # precompile the trigger regexes (categories are already extracted
+        # at this point of parse()), so _process_nested_messages doesn't
+        # rebuild them per message
+        for parent_trigger, nested_data in self.nested_messages.items():
+            nested_data['_regex'] = self._create_regex(parent_trigger)
+            for nested_pattern in nested_data['nested_patterns']:
+                nested_pattern['_regex'] = self._create_regex(
+                    nested_pattern['user_pattern']
+                )
     
     # ---------------------------------------------------------------------
     # used in get_response() :
@@ -302,11 +515,11 @@ class YoozParser:
         
         :return: The preprocessed message (str)
         """
-        for source, target in self.replacements:
-            message = re.sub(
-                rf'\b{re.escape(source)}\b', target, message
-            )
-        return message
+        if self._replacements_re is None:
+            return message
+        return self._replacements_re.sub(
+            lambda m: self._replacements_map[m.group(0)], message
+        )
     
     def _remove_stop_words(self, message: str) -> str:
         """
@@ -316,11 +529,10 @@ class YoozParser:
         
         :return: The message without stop words (str)
         """
-        words = message.split()
-        filtered_words = [
-            word for word in words if word not in self.stopWords
-        ]
-        return ' '.join(filtered_words)
+        return ' '.join(
+            word for word in message.split()
+            if word not in self._stopwords_set
+        )
     
     def _process_nested_messages(self, cleaned_message: str) -> Optional[str]:
         """
@@ -332,8 +544,14 @@ class YoozParser:
         """
         for parent_trigger, nested_data in self.nested_messages.items():
             # to generate response for outer user-message (parent_trigger)
-            regex = self._create_regex(parent_trigger)
-            if regex.match(self.last_message):
+            literals = nested_data.get('_literals')
+            if literals and not all(
+                    literal in self.last_message for literal in literals
+            ):
+                regex = None  # fixed words absent: the regex can't match
+            else:
+                regex = nested_data['_regex']
+            if regex and regex.match(self.last_message):
                 if regex.match(cleaned_message):
                     response = random.choice(nested_data['responses'])
                     self.last_message = cleaned_message
@@ -342,107 +560,156 @@ class YoozParser:
                 if parent_trigger == self.message_history[-2]:
                     for nested_pattern in nested_data["nested_patterns"]:
                         # to generate response for inner (nested) user-message
-                        regex = self._create_regex(nested_pattern['user_pattern'])
+                        literals = nested_pattern.get('_literals')
+                        if literals and not all(
+                                literal in cleaned_message
+                                for literal in literals
+                        ):
+                            continue
+                        regex = nested_pattern['_regex']
                         if regex.match(cleaned_message):
                             response = random.choice(nested_pattern['bot_responses'])
                             self.last_message = cleaned_message
                             return response
-            return None
+        return None
         
     def _process_keywords_split_by_comma(
-        self, keywords, cleaned_message, final_response, pattern
+        self, keyword_list, cleaned_message, word_set,
+        final_response, bot_responses
     ) -> str:
         """
         ...
         presence of all keywords in cleaned_message is necessary
         """
-        keyword_list = keywords.split('،')
-        if all(keyword in cleaned_message for keyword in keyword_list):  # All keywords must exist
-            final_response += random.choice(pattern['bot_responses']) + " "
-            for rule in self.rules:
-                if rule['trigger'] in final_response:
-                    if self.rules_value <= rule['rule']:
-                        trigger_index = final_response.find(rule['trigger']) + len(rule['trigger'])
-                        final_response = final_response[:trigger_index] + " " + rule[
-                            'response'] + final_response[trigger_index:]
+        if all(  # All keywords must exist
+                keyword in word_set if ' ' not in keyword
+                else keyword in cleaned_message  # multi-word keyword
+                for keyword in keyword_list
+        ):
+            # inject into the new response only: text accumulated from
+            # earlier patterns has already had its rules applied
+            final_response += self._inject_rules(
+                random.choice(bot_responses)
+            ) + " "
         return final_response if final_response else ""
                         
     def _process_keywords_split_by_underscore(
-        self, keywords, cleaned_message, final_response, pattern
+        self, keyword_list, cleaned_message, word_set,
+        final_response, bot_responses
     ) -> str:
         """
         ...
         presence of one keyword in cleaned_message  is sufficient
         """
-        keyword_list = keywords.split('_')
-        if any(keyword in cleaned_message for keyword in keyword_list):  # Any one keyword is sufficient
-            final_response += random.choice(pattern['bot_responses']) + " "
-            for rule in self.rules:
-                if rule['trigger'] in final_response:
-                    if self.rules_value <= rule['rule']:
-                        trigger_index = final_response.find(rule['trigger']) + len(rule['trigger'])
-                        final_response = final_response[:trigger_index] + " " + rule[
-                            'response'] + final_response[trigger_index:]
-                        print("====>>", final_response)
+        if any(  # Any one keyword is sufficient
+                keyword in word_set if ' ' not in keyword
+                else keyword in cleaned_message  # multi-word keyword
+                for keyword in keyword_list
+        ):
+            # inject into the new response only: text accumulated from
+            # earlier patterns has already had its rules applied
+            final_response += self._inject_rules(
+                random.choice(bot_responses)
+            ) + " "
         return final_response if final_response else ""
     
-    def _process_conditional_pattern(self, pattern, cleaned_message):
+    def _process_conditional_pattern(self, index, cleaned_message):
         """
         generates bot-response if there is conditional pattern (conditional conversation)
-        
-        :param pattern:
+
+        :param index:
         :param cleaned_message:
         :return:
         """
-        regex = self._create_regex(pattern['pattern'])
-        match = regex.match(cleaned_message)
+        literals = self._pat_literals[index]
+        if literals and not all(
+                literal in cleaned_message for literal in literals
+        ):
+            return
+        match = self._pat_regex[index].match(cleaned_message)
         if match:
+            (main_condition, main_response, optional_condition,
+             optional_response, default_response) = self._pat_conditions[index]
             # Check conditions
-            if self._evaluate_condition(pattern['main_condition'], match):
-                return self._resolve_response(pattern['main_response'], match)
+            if self._evaluate_condition(main_condition, match):
+                return self._resolve_response(main_response, match)
             elif (
-                    pattern.get('optional_condition') and
-                    self._evaluate_condition(pattern['optional_condition'], match)
+                    optional_condition and
+                    self._evaluate_condition(optional_condition, match)
             ):
-                return self._resolve_response(pattern['optional_response'], match)
+                return self._resolve_response(optional_response, match)
             else:
-                return self._resolve_response(pattern['default_response'], match)
-    
+                return self._resolve_response(default_response, match)
+
     def _process_normal_pattern(
         self,
-        pattern: dict,
+        index: int,
         cleaned_message: str,
     ) -> Optional[str]:
         """"""
-        regex = self._create_regex(pattern['user_pattern'])
-        match = regex.match(cleaned_message)
+        literals = self._pat_literals[index]
+        if literals and not all(
+                literal in cleaned_message for literal in literals
+        ):
+            return
+        match = self._pat_regex[index].match(cleaned_message)
         if match:
-            resp = random.choice(pattern['bot_responses'])
+            resp = random.choice(self._pat_responses[index])
             resp = self._resolve_response(resp, match)
-            for rule in self.rules:
-                # بخش زیر در "#عراق" باگ ایجاد میکنه...!
-                if rule['trigger'] in resp:
-                    if self.rules_value <= rule['rule']:
-                        trigger_index = resp.find(rule['trigger']) + len(rule['trigger'])
-                        resp = resp[:trigger_index] + " " + rule['response'] + resp[trigger_index:]
+            resp = self._inject_rules(resp)
             return resp
         return
     
+    def _inject_rules(self, response: str) -> str:
+        """
+        Injects the response of every applicable rule right after each
+        occurrence of its trigger, in a single scan of the response.
+
+        :param response: The generated response (str)
+
+        :return: The response with rule-responses injected (str)
+        """
+        if self._rules_re is None:
+            return response
+        return self._rules_re.sub(
+            lambda m: self._rules_injections[m.group(0)], response
+        )
+
     # ---------------------------------------------------------------------
     # others :
-    
+
+    @staticmethod
+    def _extract_literals(pattern: str) -> list:
+        """
+        Extracts the literal words of a Yooz pattern — the parts that are
+        not wildcards, &categories or {keywords}. A message can only match
+        the pattern if it contains all of them, so they act as a cheap
+        prefilter before the real regex-match.
+
+        :param pattern: The Yooz pattern (str)
+
+        :return: The literal substrings of the pattern (list)
+        """
+        return [
+            token.strip()
+            for token in _LITERAL_SPLIT_RE.split(pattern)
+            if token.strip()
+        ]
+
     def _create_regex(self, pattern: str) -> re.Pattern:
         """
         Converts a Yooz pattern to a regex-pattern for matching user messages.
-        
+        Only called at parse time: every pattern's compiled regex is attached
+        to it by _finalize_patterns() / _extract_nested_messages(), so the
+        message-processing path never translates a pattern again.
+
         :param pattern: The Yooz pattern (str)
-        
+
         :return: The compiled regex-pattern (re.Pattern)
         """
-        for category, items in self.categories:
-            pattern: str = pattern.replace(
-                f'&{category}', f"({'|'.join(items)})"
-            )
+        pattern = _CATEGORY_TOKEN_RE.sub(
+            lambda m: self._category_map.get(m.group(1), m.group(0)), pattern
+        )
         regex_pattern = re.sub(r'\*([0-9]*)', r'(.*?)', pattern)
         return re.compile(f'^{regex_pattern}$')
     
@@ -456,33 +723,32 @@ class YoozParser:
         
         :return: The resolved response (str)
         """
-        for i in range(1, len(match.groups()) + 1):
-            response = response.replace(f'*{i}', match.group(i).strip())
-        
-        def replace_variable(match_: re.Match) -> str:
+        def replace_placeholder(match_: re.Match) -> str:
             """
-            
+
             :param match_:
-            
+
             :return:
             """
-            key = match_.group(1)
-            value = self.memory.get(key, None)
-            if value:
-                return value
-            else:
-                return f"{{missing:{key}}}"
-        
-        response = re.sub(r'=(\w+):\S+', replace_variable, response)
-        response = re.sub(r'=(\w+)', replace_variable, response)
-        
-        # Replace definitions
-        response = re.sub(
-            r'#(\S+)',
-            repl=lambda m: self.definitions.get(m.group(1), m.group(0)),
-            string=response
-        )
-        return response
+            group_number, variable, definition = match_.groups()
+            if group_number:  # *N : the N-th regex-match group
+                try:
+                    value = match.group(int(group_number))
+                except IndexError:
+                    return match_.group(0)
+                # an empty string is a real (empty) wildcard match; only a
+                # nonparticipating group falls back to the placeholder
+                return match_.group(0) if value is None else value.strip()
+            if variable:  # =name / =name:value : a stored variable
+                value = self.memory.get(variable, None)
+                if value:
+                    return value
+                else:
+                    return f"{{missing:{variable}}}"
+            # #name : a general definition
+            return self.definitions.get(definition, match_.group(0))
+
+        return _RESOLVE_RE.sub(replace_placeholder, response)
     
     def _evaluate_condition(self, condition: str, matches: re.Match):
         """
@@ -494,7 +760,14 @@ class YoozParser:
         :return: the result of conditional expression
         """
         resolved_condition = self._resolve_response(condition, matches)
-        return eval(resolved_condition)
+        # compile each distinct condition once; evaluating the cached code
+        # object skips the per-message compile step, and the emptied
+        # __builtins__ keeps document conditions away from the interpreter
+        code = self._condition_cache.get(resolved_condition)
+        if code is None:
+            code = compile(resolved_condition, '<condition>', 'eval')
+            self._condition_cache[resolved_condition] = code
+        return eval(code, {'__builtins__': {}}, {})
 
 
 if __name__ == "__main__":